@@ -1,8 +1,120 @@
 import PyPDF2
 from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
 import io
+import mmap
 import numpy as np
 import re
+import sys
+
+try:
+    # PDFium (compiled C++) extracts text far faster than PyPDF2
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# RGB fill (rg) and stroke (RG) color commands in a PDF content stream.
+# PDF operators are ASCII, so the raw stream bytes are scanned directly.
+_RGB_COLOR_RE = re.compile(rb'\b([0-9]*\.?[0-9]+)\s+([0-9]*\.?[0-9]+)\s+([0-9]*\.?[0-9]+)\s+(?:rg|RG)')
+
+# "Figure x-y" where x is chapter number and y is image number,
+# followed by the caption
+_FIGURE_RE = re.compile(r'Figure\s+(\d+)-(\d+)\.?\s*([^\n\r]*)', re.IGNORECASE)
+
+# Largest figure number that can be sorted with NumPy
+_INT64_MAX = np.iinfo(np.int64).max
+
+def _rgb_palette(colorspace):
+    """
+    Read the palette of an /Indexed color space with an RGB base.
+    
+    Args:
+        colorspace: PDF color space array [/Indexed base hival lookup]
+    
+    Returns:
+        numpy.ndarray: Palette as an (n, 3) uint8 array, or None if the base
+        color space is not RGB or the palette can't be read
+    """
+    try:
+        base = colorspace[1]
+        if hasattr(base, 'get_object'):
+            base = base.get_object()
+        if isinstance(base, list) and len(base) > 0:
+            base = base[0]
+        if 'RGB' not in str(base):
+            return None
+        
+        lookup = colorspace[3]
+        if hasattr(lookup, 'get_object'):
+            lookup = lookup.get_object()
+        if hasattr(lookup, 'get_data'):
+            lookup = lookup.get_data()
+        elif hasattr(lookup, 'get_original_bytes'):
+            lookup = lookup.get_original_bytes()
+        
+        # Only entries 0..hival belong to the palette
+        hival = int(colorspace[2])
+        palette = np.frombuffer(bytes(lookup), dtype=np.uint8)[:(hival + 1) * 3]
+        palette = palette[:len(palette) // 3 * 3].reshape(-1, 3)
+        return palette if len(palette) else None
+    except Exception as e:
+        return None
+
+def _color_range_masks(r, g, b):
+    """
+    Find yellow-ish and blue-ish colors. The ratios are compared in integers
+    (r > 0.8g as 5r > 4g) so nothing is promoted to float.
+    
+    Args:
+        r, g, b: Channel values as uint16 arrays
+    
+    Returns:
+        tuple: Boolean (yellow_mask, blue_mask) arrays
+    """
+    yellow_mask = (5 * r > 4 * g) & (5 * g > 6 * b) & (r > 100)
+    blue_mask = (5 * b > 6 * r) & (5 * b > 6 * g) & (b > 100)
+    return yellow_mask, blue_mask
+
+def _indexed_has_color(obj, palette, sample_threshold):
+    """
+    Decide whether an 8-bit /Indexed image shows color from how many pixels use
+    each palette entry, without converting the image to RGB.
+    
+    Args:
+        obj: PDF image XObject with an /Indexed color space
+        palette: Palette as an (n, 3) uint8 array, see _rgb_palette
+        sample_threshold: Percentage of colored pixels needed, as in is_color_page
+    
+    Returns:
+        bool: True if the image shows color, or None if its raster can't be read
+        this way
+    """
+    if obj.get('/BitsPerComponent') != 8:
+        return None
+    try:
+        indices = np.frombuffer(obj.get_data(), dtype=np.uint8)
+    except Exception as e:
+        return None
+    total_pixels = obj.get('/Width', 0) * obj.get('/Height', 0)
+    if total_pixels == 0 or len(indices) < total_pixels:
+        return None
+    
+    # Out-of-range indices are clamped to hival, as in PDF viewers
+    counts = np.bincount(np.minimum(indices[:total_pixels], len(palette) - 1), minlength=len(palette))
+    
+    # Same checks as the pixel analysis in is_color_page, applied to the entries
+    # and weighted by how many pixels use them
+    r, g, b = palette.astype(np.uint16).T
+    non_grayscale = (r != g) | (g != b)
+    if counts[non_grayscale].sum() / total_pixels > sample_threshold * 0.5:
+        return True
+    yellow_mask, blue_mask = _color_range_masks(r, g, b)
+    if counts[yellow_mask].sum() / total_pixels > sample_threshold * 0.1:
+        return True
+    if counts[blue_mask].sum() / total_pixels > sample_threshold * 0.1:
+        return True
+    return False
 
 def is_color_page(page, color_threshold=3, sample_threshold=0.001):
     """
@@ -10,47 +122,29 @@ def is_color_page(page, color_threshold=3, sample_threshold=0.001):
     
     Args:
         page: PyPDF2 page object
-        color_threshold: RGB difference threshold to consider a pixel colored
+        color_threshold: Ignored; kept so existing calls keep working. Results are the
+            same as before, because any pixel over this threshold is also caught
+            by the non-grayscale check
         sample_threshold: Percentage of colored pixels needed to classify page as colored
     
     Returns:
         bool: True if page is colored, False if monochrome
     """
-    has_color = False
-    
     try:
         # Check for vector graphics color in page content
         if hasattr(page, 'extract_text') and '/Contents' in page:
             try:
-                content = page['/Contents']
-                if hasattr(content, 'get_data'):
-                    content_data = content.get_data().decode('latin-1', errors='ignore')
-                elif isinstance(content, list):
-                    content_data = ""
-                    for c in content:
-                        if hasattr(c, 'get_data'):
-                            content_data += c.get_data().decode('latin-1', errors='ignore')
-                
-                # Look for color commands in PDF content stream
-                color_patterns = [
-                    r'\b([0-9]*\.?[0-9]+)\s+([0-9]*\.?[0-9]+)\s+([0-9]*\.?[0-9]+)\s+rg',  # RGB color
-                    r'\b([0-9]*\.?[0-9]+)\s+([0-9]*\.?[0-9]+)\s+([0-9]*\.?[0-9]+)\s+RG',  # RGB stroke color
-                    r'\b([0-9]*\.?[0-9]+)\s+g',  # Gray fill (check if not 0 or 1)
-                    r'\b([0-9]*\.?[0-9]+)\s+G',  # Gray stroke
-                ]
+                content_data = _content_bytes(page)
                 
-                for pattern in color_patterns:
-                    matches = re.findall(pattern, content_data)
-                    for match in matches:
-                        if len(match) == 3:  # RGB
-                            r, g, b = float(match[0]), float(match[1]), float(match[2])
-                            if not (r == g == b):  # Not grayscale
-                                return True
-                        elif len(match) == 1:  # Gray
-                            gray_val = float(match[0])
-                            # If gray value is not pure black (0) or white (1), it might indicate color usage
-                            if 0 < gray_val < 1 and gray_val not in [0.5, 0.25, 0.75]:
-                                pass  # This alone doesn't indicate color
+                # Look for RGB color commands in PDF content stream. Gray fill/stroke
+                # commands alone don't indicate color, so they are not matched.
+                # A plain byte search first skips the regex on streams that never
+                # set an RGB color.
+                if b'rg' in content_data or b'RG' in content_data:
+                    for match in _RGB_COLOR_RE.finditer(content_data):
+                        r, g, b = float(match[1]), float(match[2]), float(match[3])
+                        if not (r == g == b):  # Not grayscale
+                            return True
             except:
                 pass
         
@@ -84,9 +178,28 @@ def is_color_page(page, color_threshold=3, sample_threshold=0.001):
                                 else:
                                     cs_name = str(colorspace)
                                 
-                                # If color space indicates color, mark as colored
+                                # If color space indicates color, the page is colored; no need
+                                # to decode the image itself
                                 if any(cs in cs_name for cs in ['RGB', 'Lab', 'DeviceRGB']):
-                                    has_color = True
+                                    return True
+                                
+                                # DeviceGray and CalGray images can't hold color; skip decoding them
+                                if 'Gray' in cs_name:
+                                    continue
+                                
+                                # An indexed image can only show its palette colors, so counting
+                                # which entries its pixels use avoids an RGB decode
+                                if cs_name == '/Indexed':
+                                    palette = _rgb_palette(colorspace)
+                                    if palette is not None:
+                                        # An all-gray palette can't show color
+                                        if not np.any(palette != palette[:, :1]):
+                                            continue
+                                        indexed_color = _indexed_has_color(obj, palette, sample_threshold)
+                                        if indexed_color is not None:
+                                            if indexed_color:
+                                                return True
+                                            continue
                             
                             # Try to extract and analyze image data
                             try:
@@ -94,64 +207,81 @@ def is_color_page(page, color_threshold=3, sample_threshold=0.001):
                                 if data:
                                     img = Image.open(io.BytesIO(data))
                                     
-                                    # Convert to RGB if needed
-                                    if img.mode in ['RGBA', 'CMYK', 'LAB']:
+                                    # Large images are analyzed at about 100 pixels on the short side
+                                    target_size = None
+                                    if img.width * img.height > 1000000:
+                                        step = max(1, min(img.width, img.height) // 100)
+                                        target_size = (img.width // step, img.height // step)
+                                        if img.format == 'JPEG':
+                                            # libjpeg can decode at 1/2, 1/4 or 1/8 scale inside the
+                                            # IDCT, which is far cheaper than a full-size decode
+                                            img.draft(img.mode, target_size)
+                                    
+                                    # Convert to RGB if needed. RGBA images that don't need
+                                    # downsampling are used as is: the channel split below simply
+                                    # leaves out alpha, saving a full conversion pass
+                                    if img.mode in ['CMYK', 'LAB']:
                                         img = img.convert('RGB')
                                     elif img.mode == 'P':  # Palette mode
                                         img = img.convert('RGB')
+                                    elif img.mode == 'RGBA' and target_size:
+                                        img = img.convert('RGB')
                                     
-                                    if img.mode == 'RGB':
+                                    if img.mode in ['RGB', 'RGBA']:
+                                        # Downsample large images the rest of the way by averaging blocks.
+                                        # Unlike strided sampling this can't skip over thin color lines
+                                        if target_size:
+                                            factor = min(img.width // target_size[0], img.height // target_size[1])
+                                            if factor > 1:
+                                                img = img.reduce(factor)
+                                        
                                         # More sensitive color detection
                                         img_array = np.array(img)
                                         if len(img_array.shape) == 3 and img_array.shape[2] >= 3:
-                                            # Sample image for large images
-                                            if img_array.shape[0] * img_array.shape[1] > 1000000:
-                                                step = max(1, min(img_array.shape[0], img_array.shape[1]) // 100)
-                                                img_array = img_array[::step, ::step]
-                                            
-                                            r, g, b = img_array[:,:,0], img_array[:,:,1], img_array[:,:,2]
-                                            
-                                            # Multiple color detection methods
-                                            # Method 1: Channel differences
-                                            diff_rg = np.abs(r.astype(int) - g.astype(int))
-                                            diff_rb = np.abs(r.astype(int) - b.astype(int))
-                                            diff_gb = np.abs(g.astype(int) - b.astype(int))
-                                            
-                                            color_pixels = np.sum((diff_rg > color_threshold) | 
-                                                                 (diff_rb > color_threshold) | 
-                                                                 (diff_gb > color_threshold))
-                                            
+                                            # Split into contiguous channel planes so the masks below
+                                            # stream through memory instead of striding over pixels
+                                            r, g, b = np.ascontiguousarray(img_array[:,:,:3].transpose(2, 0, 1))
                                             total_pixels = img_array.shape[0] * img_array.shape[1]
                                             
-                                            if color_pixels / total_pixels > sample_threshold:
-                                                return True
+                                            # Any pixel whose channels differ is non-grayscale. This single
+                                            # boolean mask is a superset of the channel-difference test and of
+                                            # the color ranges below, so it bounds every method at once.
+                                            # It is built in bands of ~64K pixels so the temporaries stay in
+                                            # cache, stopping as soon as enough colored pixels are found.
+                                            non_grayscale = np.empty(r.shape, dtype=bool)
+                                            non_grayscale_pixels = 0
+                                            band_rows = max(1, 65536 // r.shape[1])
+                                            for start in range(0, r.shape[0], band_rows):
+                                                band = slice(start, start + band_rows)
+                                                np.not_equal(r[band], g[band], out=non_grayscale[band])
+                                                non_grayscale[band] |= g[band] != b[band]
+                                                non_grayscale_pixels += np.count_nonzero(non_grayscale[band])
+                                                
+                                                if non_grayscale_pixels / total_pixels > sample_threshold * 0.5:
+                                                    return True
                                             
-                                            # Method 2: Check for non-grayscale pixels more broadly
-                                            is_grayscale = (r == g) & (g == b)
-                                            non_grayscale = np.sum(~is_grayscale)
+                                            # Too few non-grayscale pixels for any color range to qualify
+                                            if non_grayscale_pixels / total_pixels <= sample_threshold * 0.1:
+                                                continue
                                             
-                                            if non_grayscale / total_pixels > sample_threshold * 0.5:
-                                                return True
+                                            # Look for specific color ranges (yellows, blues, etc.),
+                                            # only among the non-grayscale pixels
+                                            r, g, b = (c[non_grayscale].astype(np.uint16) for c in (r, g, b))
+                                            yellow_mask, blue_mask = _color_range_masks(r, g, b)
                                             
-                                            # Method 3: Look for specific color ranges (yellows, blues, etc.)
                                             # Yellow-ish colors (like in your example)
-                                            yellow_mask = (r > g * 0.8) & (g > b * 1.2) & (r > 100)
-                                            yellow_pixels = np.sum(yellow_mask)
+                                            yellow_pixels = np.count_nonzero(yellow_mask)
                                             
                                             if yellow_pixels / total_pixels > sample_threshold * 0.1:
                                                 return True
                                             
                                             # Blue-ish colors
-                                            blue_mask = (b > r * 1.2) & (b > g * 1.2) & (b > 100)
-                                            blue_pixels = np.sum(blue_mask)
+                                            blue_pixels = np.count_nonzero(blue_mask)
                                             
                                             if blue_pixels / total_pixels > sample_threshold * 0.1:
                                                 return True
                                         
                             except Exception as img_error:
-                                # If we can't process the image but it has RGB colorspace, assume it might have color
-                                if has_color:
-                                    return True
                                 continue
                                 
                         except Exception as obj_error:
@@ -162,61 +292,250 @@ def is_color_page(page, color_threshold=3, sample_threshold=0.001):
     except Exception as e:
         pass
     
-    return has_color
+    return False
+
+def _page_text(page):
+    """
+    Extract the text of a page.
+    
+    Args:
+        page: PyPDF2 or pypdfium2 page object
+    
+    Returns:
+        str: Text of the page
+    """
+    if hasattr(page, 'get_textpage'):  # pypdfium2 page
+        return page.get_textpage().get_text_range()
+    return page.extract_text()
+
+def _content_bytes(page):
+    """
+    Read the raw content stream of a page.
+    
+    Args:
+        page: PyPDF2 page object
+    
+    Returns:
+        bytes: Decompressed content stream data, empty if the page has none
+    """
+    if '/Contents' not in page:
+        return b""
+    content = page['/Contents']
+    if isinstance(content, list):
+        return b"".join(c.get_object().get_data() for c in content)
+    return content.get_data()
+
+def _may_contain_figure(page):
+    """
+    Cheaply check whether a page could contain a Figure x-y pattern, without
+    extracting its text.
+    
+    Text shown with a simple font appears literally in the content stream, so
+    a byte search rules out most pages. Fonts that encode text as glyph codes
+    hide the word, so this check can miss figures on such PDFs.
+    
+    Args:
+        page: PyPDF2 page object
+    
+    Returns:
+        bool: False if the content stream has no "igure" or "IGURE" bytes
+    """
+    raw = _content_bytes(page)
+    return b'igure' in raw or b'IGURE' in raw
+
+def _find_figures(text):
+    """
+    Find "Figure x-y" patterns in text, matching exactly what _FIGURE_RE.findall
+    would for text that only spells the word as "Figure". Locating the word with
+    str.find and parsing the rest by hand is much cheaper than running the regex
+    engine over the whole page.
+    
+    Args:
+        text: Text of a page
+    
+    Yields:
+        tuple: (chapter_num, image_num, caption) as strings
+    """
+    end = len(text)
+    pos = text.find('Figure')
+    while pos != -1:
+        # Whitespace, then "x-y" where both are runs of digits
+        i = pos + 6
+        while i < end and text[i].isspace():
+            i += 1
+        chapter_start = j = i
+        while j < end and text[j].isdecimal():
+            j += 1
+        if i == pos + 6 or j == chapter_start or j == end or text[j] != '-':
+            pos = text.find('Figure', pos + 1)
+            continue
+        image_start = k = j + 1
+        while k < end and text[k].isdecimal():
+            k += 1
+        if k == image_start:
+            pos = text.find('Figure', pos + 1)
+            continue
+        
+        # Optional period and whitespace, then the caption up to the end of the line
+        caption_start = k
+        if caption_start < end and text[caption_start] == '.':
+            caption_start += 1
+        while caption_start < end and text[caption_start].isspace():
+            caption_start += 1
+        caption_end = caption_start
+        while caption_end < end and text[caption_end] not in '\n\r':
+            caption_end += 1
+        
+        yield text[chapter_start:j], text[image_start:k], text[caption_start:caption_end]
+        pos = text.find('Figure', caption_end)
+
+def _iter_figures(text):
+    """
+    Find Figure x-y patterns with captions in page text, lazily, so callers
+    can stop at the first one.
+    
+    Args:
+        text: Text of a page
+    
+    Yields:
+        tuple: (figure_number, caption) for each figure found
+    """
+    if not text:
+        return
+    
+    # Most pages have no figures at all; a plain substring search rules them
+    # out much faster than the regex ("igure" covers Figure and figure)
+    if 'igure' not in text and 'IGURE' not in text:
+        return
+    
+    if 'figure' in text or 'IGURE' in text:
+        # Other spellings need the case-insensitive regex
+        matches = (match.groups() for match in _FIGURE_RE.finditer(text))
+    else:
+        matches = _find_figures(text)
+    
+    # Extract figure information for all matches with captions
+    for chapter_num, image_num, caption in matches:
+        # Clean up caption text
+        caption = caption.strip()
+        if caption:
+            # Remove any trailing periods or extra whitespace
+            caption = caption.rstrip('.')
+            yield f"{chapter_num}-{image_num}", caption
+
+def _figures_in_text(text):
+    """
+    Extract all Figure x-y patterns with captions from page text.
+    
+    Args:
+        text: Text of a page
+    
+    Returns:
+        list: List of tuples (figure_number, caption) for all figures found
+    """
+    return list(_iter_figures(text))
 
 def extract_figure_info(page):
     """
     Extract all Figure x-y patterns with captions from a page.
     
     Args:
-        page: PyPDF2 page object
+        page: PyPDF2 or pypdfium2 page object
     
     Returns:
         list: List of tuples (figure_number, caption) for all figures found
     """
-    figures = []
     try:
-        # Extract text from the page
-        text = page.extract_text()
-        if not text:
-            return figures
-        
-        # Pattern to match "Figure x-y" where x is chapter number and y is image number
-        # Also captures the caption that follows
-        figure_pattern = r'Figure\s+(\d+)-(\d+)\.?\s*([^\n\r]*)'
-        
-        matches = re.findall(figure_pattern, text, re.IGNORECASE)
-        
-        # Extract figure information for all matches with captions
-        for match in matches:
-            chapter_num, image_num, caption = match
-            # Clean up caption text
-            caption = caption.strip()
-            if caption:
-                # Remove any trailing periods or extra whitespace
-                caption = caption.rstrip('.')
-                figure_number = f"{chapter_num}-{image_num}"
-                figures.append((figure_number, caption))
-        
-        return figures
-        
+        return _figures_in_text(_page_text(page))
     except Exception as e:
-        return figures
+        return []
 
 def has_figure_pattern(page):
     """
     Check if a page contains Figure x-y pattern with caption.
     
     Args:
-        page: PyPDF2 page object
+        page: PyPDF2 or pypdfium2 page object
     
     Returns:
         bool: True if page contains Figure x-y pattern, False otherwise
     """
-    figures = extract_figure_info(page)
-    return len(figures) > 0
+    try:
+        text = _page_text(page)
+    except Exception as e:
+        return False
+    
+    # Same gate and matching as extract_figure_info, so the two always agree,
+    # but stop at the first figure with a caption instead of collecting them all
+    return any(True for figure in _iter_figures(text))
 
-def find_figure_pages(pdf_path, output_file='figure_pages.txt', page_offset=33):
+@contextmanager
+def _open_pdf(pdf_path):
+    """
+    Open a PDF for reading. The file is memory-mapped while the context is open
+    and unmapped on exit, so the reader must not be used afterwards.
+    
+    Args:
+        pdf_path: Path to the PDF file
+    
+    Yields:
+        PyPDF2.PdfReader: Reader for the PDF
+    """
+    # Map the file instead of reading it into memory: the OS page cache serves
+    # the reader's random seeks directly
+    with open(pdf_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map:
+        yield PyPDF2.PdfReader(pdf_map)
+
+# Documents opened by _init_worker, reused for every page a worker process handles.
+# Workers only live inside find_figure_pages' executor, and the mapping behind
+# _worker_reader is released when the worker exits.
+_worker_pdf = ExitStack()
+_worker_reader = None
+_worker_document = None
+_worker_prefilter = False
+
+def _init_worker(pdf_path, prefilter=False):
+    """
+    Open the PDF once in a new worker process.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        prefilter: Skip extraction on pages whose raw content stream can't contain a figure
+    """
+    global _worker_reader, _worker_document, _worker_prefilter
+    _worker_prefilter = prefilter
+    if pdfium is None or prefilter:
+        _worker_reader = _worker_pdf.enter_context(_open_pdf(pdf_path))
+    if pdfium is not None:
+        _worker_document = pdfium.PdfDocument(pdf_path)
+
+def _extract_page_text(page_num):
+    """
+    Extract the text of one page. Runs in a worker process set up by _init_worker.
+    
+    Args:
+        page_num: Page index (0-indexed)
+    
+    Returns:
+        str: Text of the page, or an empty string if extraction fails or is skipped
+    """
+    if _worker_prefilter:
+        try:
+            if not _may_contain_figure(_worker_reader.pages[page_num]):
+                return ""
+        except Exception as e:
+            pass  # Can't rule the page out, so extract its text anyway
+    
+    try:
+        if _worker_document is not None:
+            page = _worker_document[page_num]
+        else:
+            page = _worker_reader.pages[page_num]
+        return _page_text(page) or ""
+    except Exception as e:
+        return ""
+
+def find_figure_pages(pdf_path, output_file='figure_pages.txt', page_offset=33, prefilter=False):
     """
     Identify all pages containing Figure x-y patterns with captions in a PDF document.
     Creates a detailed output file with figure information and page numbers.
@@ -225,6 +544,9 @@ def find_figure_pages(pdf_path, output_file='figure_pages.txt', page_offset=33):
         pdf_path: Path to the PDF file
         output_file: Path to save the results
         page_offset: Number of pages to subtract for book page numbering (default 33)
+        prefilter: Skip text extraction on pages whose raw content stream doesn't
+            contain "Figure". Much faster, but misses figures in PDFs whose fonts
+            encode text as glyph codes (default False)
     
     Returns:
         list: Page numbers of pages with Figure patterns (book page numbering)
@@ -233,19 +555,28 @@ def find_figure_pages(pdf_path, output_file='figure_pages.txt', page_offset=33):
     all_figures = []
     
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            total_pages = len(pdf_reader.pages)
-            
-            print(f"Analyzing {total_pages} pages...")
+        if pdfium is not None:
+            pdf_document = pdfium.PdfDocument(pdf_path)
+            try:
+                total_pages = len(pdf_document)
+            finally:
+                pdf_document.close()
+        else:
+            with _open_pdf(pdf_path) as pdf_reader:
+                total_pages = len(pdf_reader.pages)
+        
+        print(f"Analyzing {total_pages} pages...")
+        
+        # Pages are independent, so worker processes extract their text in
+        # parallel; figures are matched here as each page's text arrives
+        with ProcessPoolExecutor(initializer=_init_worker, initargs=(pdf_path, prefilter)) as executor:
+            results = executor.map(_extract_page_text, range(total_pages), chunksize=16)
             
-            for page_num in range(total_pages):
-                page = pdf_reader.pages[page_num]
+            for page_num, text in enumerate(results):
                 pdf_page_num = page_num + 1  # PDF page number (1-indexed)
                 book_page_num = pdf_page_num - page_offset  # Book page number
                 
-                # Extract figure information from the page
-                figures_on_page = extract_figure_info(page)
+                figures_on_page = _figures_in_text(text)
                 
                 if figures_on_page:
                     figure_pages.append(book_page_num)
@@ -270,36 +601,45 @@ def find_figure_pages(pdf_path, output_file='figure_pages.txt', page_offset=33):
         book_figures = [fig for fig in all_figures if fig['book_page'] > 0]
         front_matter_figures = [fig for fig in all_figures if fig['book_page'] <= 0]
         
+        # Build the report in memory and write it out in one go
+        out = []
+        out.append(f"Figure Analysis Report\n")
+        out.append(f"=====================\n\n")
+        out.append(f"Total PDF pages analyzed: {total_pages}\n")
+        out.append(f"Page offset applied: {page_offset} (PDF page {page_offset + 1} = Book page 1)\n")
+        out.append(f"Total figures found: {len(all_figures)}\n")
+        out.append(f"Figures in book content: {len(book_figures)}\n")
+        out.append(f"Figures in front matter: {len(front_matter_figures)}\n\n")
+        
+        out.append("Detailed Figure Information:\n")
+        out.append("===========================\n\n")
+        
+        # Sort figures by figure number (chapter-number), parsing each number once
+        # and letting NumPy sort the integer keys
+        keys = [tuple(int(part) for part in fig['figure_number'].split('-')) for fig in book_figures]
+        if all(chapter_num <= _INT64_MAX and image_num <= _INT64_MAX for chapter_num, image_num in keys):
+            chapters = np.fromiter((key[0] for key in keys), dtype=np.int64, count=len(keys))
+            images = np.fromiter((key[1] for key in keys), dtype=np.int64, count=len(keys))
+            order = np.lexsort((images, chapters))
+        else:
+            # Some garbage reference has a number too large for int64
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+        sorted_figures = [book_figures[i] for i in order]
+        
+        for fig in sorted_figures:
+            out.append(f"Figure {fig['figure_number']}. {fig['caption']} on page number: {fig['pdf_page']}. ")
+            out.append(f"This includes an offset of {page_offset}. ")
+            out.append(f"That is this Figure {fig['figure_number']} is present on page number {fig['book_page']} ({fig['pdf_page']} of {total_pages})\n\n")
+        
+        if front_matter_figures:
+            out.append("\nFigures in Front Matter:\n")
+            out.append("========================\n\n")
+            for fig in front_matter_figures:
+                out.append(f"Figure {fig['figure_number']}. {fig['caption']} on PDF page: {fig['pdf_page']}\n\n")
+        
         # Save detailed results to file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"Figure Analysis Report\n")
-            f.write(f"=====================\n\n")
-            f.write(f"Total PDF pages analyzed: {total_pages}\n")
-            f.write(f"Page offset applied: {page_offset} (PDF page {page_offset + 1} = Book page 1)\n")
-            f.write(f"Total figures found: {len(all_figures)}\n")
-            f.write(f"Figures in book content: {len(book_figures)}\n")
-            f.write(f"Figures in front matter: {len(front_matter_figures)}\n\n")
-            
-            f.write("Detailed Figure Information:\n")
-            f.write("===========================\n\n")
-            
-            # Sort figures by figure number (chapter-number)
-            def sort_key(fig):
-                parts = fig['figure_number'].split('-')
-                return (int(parts[0]), int(parts[1]))
-            
-            sorted_figures = sorted(book_figures, key=sort_key)
-            
-            for fig in sorted_figures:
-                f.write(f"Figure {fig['figure_number']}. {fig['caption']} on page number: {fig['pdf_page']}. ")
-                f.write(f"This includes an offset of {page_offset}. ")
-                f.write(f"That is this Figure {fig['figure_number']} is present on page number {fig['book_page']} ({fig['pdf_page']} of {total_pages})\n\n")
-            
-            if front_matter_figures:
-                f.write("\nFigures in Front Matter:\n")
-                f.write("========================\n\n")
-                for fig in front_matter_figures:
-                    f.write(f"Figure {fig['figure_number']}. {fig['caption']} on PDF page: {fig['pdf_page']}\n\n")
+        with open(output_file, 'wb') as f:
+            f.write(''.join(out).encode('utf-8'))
         
         print(f"\nAnalysis complete!")
         print(f"Total figures found: {len(all_figures)}")
@@ -316,6 +656,7 @@ def find_figure_pages(pdf_path, output_file='figure_pages.txt', page_offset=33):
 # Usage
 if __name__ == "__main__":
     pdf_path = "hmlpy.pdf"  # Replace with your PDF path
-    figure_pages = find_figure_pages(pdf_path)
+    prefilter = '--prefilter' in sys.argv[1:]  # See find_figure_pages
+    figure_pages = find_figure_pages(pdf_path, prefilter=prefilter)
     
     print(f"\nPages with Figure x-y patterns: {figure_pages}")
\ No newline at end of file